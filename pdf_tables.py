@@ -0,0 +1,43 @@
+import re
+import pdfplumber
+
+# ------------------------------------------------------------
+# Table extraction worker. Kept out of scanner.py so that worker processes can
+# unpickle it by importing this module rather than the Streamlit script.
+# ------------------------------------------------------------
+PAPER_ID_RE = re.compile(r'\b(\d{5})\b')
+ROLL_RE = re.compile(r'\b(\d{9,})\b')   # roll numbers are at least 9 digits
+
+def iter_page_tables(source, pages):
+    # Tables of each page in turn, one list per page. source is a file path (workers)
+    # or an in-memory stream (serial path); each call opens its own document.
+    with pdfplumber.open(source) as pdf:
+        for i in pages:
+            yield pdf.pages[i].extract_tables()
+
+def extract_page_range(source, pages):
+    # Worker entry point: a generator cannot be sent back from another process
+    return list(iter_page_tables(source, pages))
+
+def collect_tables(per_page, expected=None):
+    # Flatten per-page tables in page order. With expected set, stop once that many
+    # distinct students have been seen. One more page is still read, since a student's
+    # paper rows can run over a page break.
+    tables = []
+    seen = set()
+    for page_tables in per_page:
+        tables.extend(page_tables)
+        if expected:
+            if len(seen) >= expected:
+                break
+            seen.update(_student_rolls(page_tables))
+    return tables
+
+def _student_rolls(tables):
+    # Roll numbers of the rows parse_roll_list keeps: a roll number and a paper ID
+    for table in tables:
+        for row in table:
+            row_str = " ".join(str(c) for c in row if c)
+            roll_match = ROLL_RE.search(row_str)
+            if roll_match and PAPER_ID_RE.search(row_str):
+                yield roll_match.group(1)
@@ -1,133 +1,232 @@
 import streamlit as st
-import pdfplumber
+import pymupdf
+import multiprocessing
+import os
 import re
+import tempfile
 import pandas as pd
+import xlsxwriter
 from io import BytesIO
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, groupby, repeat
+from sys import intern
+from pdf_tables import PAPER_ID_RE as _PAPER_ID_RE, ROLL_RE as _ROLL_RE
+from pdf_tables import collect_tables, extract_page_range, iter_page_tables
 
-st.set_page_config(page_title="Exam Schedule", layout="wide")
-st.title("📋 Exam Schedule")
-# st.markdown("Upload **Date Sheet PDF** and **Roll List PDF**. If extraction fails, expand the debug sections to see raw text.")
+# ------------------------------------------------------------
+# Patterns (compiled once at import, not on every parse)
+# ------------------------------------------------------------
+# _PAPER_ID_RE and _ROLL_RE come from pdf_tables, which the table workers share
+_WS_RE = re.compile(r'\s+')
+_NEWLINE_RE = re.compile(r'\n')
+_ROLL_SPLIT_RE = re.compile(r'Roll\s*No\.?\s*', re.IGNORECASE)
+# Name runs to the end of its line (or a following field label); bounded so failed matches
+# stay linear. Only matched at the first label, so a name over the bound cannot make the
+# search move on to a later "Father's Name"
+_NAME_LABEL_RE = re.compile(r'Name', re.IGNORECASE)
+_NAME_RE = re.compile(r'Name[:\s]+([A-Z][A-Z\s]{1,60}?)(?=\s+(?:Father|SUBJECTS|Roll)\b|\s*\n|\s*$)', re.IGNORECASE)
+_CAP_NAME_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,4})')   # up to 5 capitalised words
+_TOTAL_RE = re.compile(r'Total\s+Candidates?\s*[:\-]?\s*(\d+)', re.IGNORECASE)
+# Date and paper id in one alternation so each date sheet line is scanned once. The
+# paper code is searched separately, only on lines with an ID: codes such as
+# MATH.10101-101 contain an ID, and a single alternation can report only one of them.
+_LINE_TOKEN_RE = re.compile(r'(?P<date>\d{2}[\.\-]\d{2}[\.\-]\d{4})|(?P<pid>\b\d{5}\b)')
+_CODE_RE = re.compile(r'\b[\w\.]+?-\d{3,4}\b')
+
+# ------------------------------------------------------------
+# 0. Extract (each PDF is opened once per upload and cached)
+# ------------------------------------------------------------
+@st.cache_data(show_spinner=False)
+def extract_all_text(pdf_bytes):
+    # PyMuPDF is much faster than pdfplumber for plain text; pdfplumber is kept for tables
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [_page_text(page) for page in doc]
+
+def _page_text(page, y_tolerance=3):
+    # get_text("text") emits every table cell as its own line, which breaks the
+    # "date subject code paper-id" rows of a ruled date sheet. Rebuild visual lines
+    # the way pdfplumber's extract_text() does: words whose tops lie within
+    # y_tolerance form one line, read left to right.
+    lines = []
+    line, line_top = [], None
+    for x0, y0, _, _, word, *_ in sorted(page.get_text("words"), key=lambda w: (w[1], w[0])):
+        if line and y0 - line_top > y_tolerance:
+            lines.append(line)
+            line = []
+        if not line:
+            line_top = y0
+        line.append((x0, word))
+    if line:
+        lines.append(line)
+    return "\n".join(" ".join(w for _, w in sorted(ln)) for ln in lines)
+
+# A spawned worker spends about 1.2 s importing streamlit/pandas/pymupdf/pdfplumber,
+# while pdfplumber takes 0.05-0.15 s a page, so each worker needs this many pages to
+# pay for its start-up
+_PAGES_PER_WORKER = 50
+_PAGES_PER_TASK = 10   # pages handed to a worker at a time
+
+def expected_candidates(pages):
+    # Heuristic: roll lists often print "Total Candidates: N" on the first page.
+    # None when there is no such header, in which case every page is read.
+    m = _TOTAL_RE.search(pages[0]) if pages else None
+    return int(m.group(1)) if m else None
+
+@st.cache_data(show_spinner=False)
+def extract_all_tables(pdf_bytes, expected=None):
+    # pdfplumber's default "lines" strategy builds tables only from ruling lines, so
+    # pages without any vector drawing are skipped. PyMuPDF finds those in C; pdfplumber
+    # would have to parse every character of the page just to learn it has no edges.
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        ruled = [page.number for page in doc if page.get_cdrawings()]
+
+    # pdfplumber table detection is pure Python (GIL-bound), so large roll lists are
+    # split into contiguous page ranges and extracted in separate processes
+    workers = min(os.cpu_count() or 1, len(ruled) // _PAGES_PER_WORKER)
+    if workers < 2:
+        return collect_tables(iter_page_tables(BytesIO(pdf_bytes), ruled), expected)
+
+    # Short page ranges rather than one range per worker, so the expected-count early
+    # stop can drop the ranges no worker has started yet
+    ranges = [ruled[k:k + _PAGES_PER_TASK] for k in range(0, len(ruled), _PAGES_PER_TASK)]
+    # Workers get a temp file path rather than a pickled copy of the bytes each;
+    # they all read it back from the OS page cache
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'roll_list.pdf')
+        with open(path, 'wb') as f:
+            f.write(pdf_bytes)
+        # spawn, not the POSIX default fork: forking the multi-threaded Streamlit server
+        # can deadlock the child. A spawned child imports this script as __mp_main__,
+        # where the UI guard below skips everything but the definitions.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+            # map yields results in page order, so the early stop sees pages in the same
+            # order as the serial path and keeps the same tables
+            chunks = ex.map(extract_page_range, repeat(path), ranges)
+            tables = collect_tables(chain.from_iterable(chunks), expected)
+            ex.shutdown(cancel_futures=True)
+    return tables
 
 # ------------------------------------------------------------
-# 1. Parse Date Sheet (line‑by‑line, robust)
+# 1. Parse Date Sheet (one scan, line by line, robust)
 # ------------------------------------------------------------
-def parse_date_sheet(pdf_file):
+@st.cache_data(show_spinner=False)
+def parse_date_sheet(pages):
     exam_map = {}          # paper_id -> (date, subject, paper_code)
     current_date = None
-    paper_id_pattern = re.compile(r'\b(\d{5})\b')
-    code_pattern = re.compile(r'(\b[\w\.]+?-\d{3,4}\b)')
-
-    all_lines = []
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                all_lines.extend(text.split('\n'))
-
-    i = 0
-    while i < len(all_lines):
-        line = all_lines[i].strip()
-        if not line:
-            i += 1
-            continue
+    full_text = "\n".join(pages)
+
+    # Single pass over the whole text; tokens are grouped back into lines by the
+    # index of the line they start on. Lines without any token change nothing.
+    # Line starts are indexed once, so finding a token's line is a bisect rather than
+    # an rfind back over the line (quadratic on PDFs that extract as one long line).
+    line_starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(full_text)]
+    tokens = _LINE_TOKEN_RE.finditer(full_text)
+    line_starts.append(len(full_text) + 1)   # sentinel: every line has a next start
+    for line_no, line_tokens in groupby(tokens, key=lambda m: bisect_right(line_starts, m.start()) - 1):
+        line_start = line_starts[line_no]
+        # Every date and paper ID on this line; the first date is the one that counts
+        date_matches = []
+        pid_matches = []
+        for m in line_tokens:
+            (pid_matches if m.lastgroup == 'pid' else date_matches).append(m)
+        date = date_matches[0].group('date') if date_matches else None
 
         # Look for a date (dd.mm.yyyy or dd-mm-yyyy)
-        date_match = re.search(r'(\d{2}[\.\-]\d{2}[\.\-]\d{4})', line)
-        if date_match:
-            current_date = date_match.group(1).replace('-', '.')
+        if date:
+            current_date = date.replace('-', '.')
             # The same line might contain a paper entry, so we don't skip; we'll process it below
 
-        # If we have a date, try to find paper IDs on this line
-        if current_date:
-            paper_ids = paper_id_pattern.findall(line)
-            if paper_ids:
-                # Extract paper code
-                code_match = code_pattern.search(line)
-                paper_code = code_match.group(1) if code_match else ""
-
-                # Subject: everything before the first paper ID or paper code
-                subject = line
-                if paper_code and paper_code in line:
-                    subject = line[:line.index(paper_code)].strip()
-                elif paper_ids:
-                    first_pid_pos = line.find(paper_ids[0])
-                    subject = line[:first_pid_pos].strip()
-                subject = re.sub(r'\s+', ' ', subject).strip(' -')
+        # If we have a date, record the paper IDs found on this line
+        if current_date and pid_matches:
+            line_end = line_starts[line_no + 1] - 1
+            code_match = _CODE_RE.search(full_text, line_start, line_end)
+            # A dashed date (13-05-2024) also looks like a code; look past it
+            for d in date_matches:
+                if code_match and code_match.start() < d.end() and d.start() < code_match.end():
+                    code_match = _CODE_RE.search(full_text, d.end(), line_end)
+            paper_code = code_match.group() if code_match else ""
 
-                for pid in paper_ids:
-                    exam_map[pid] = (current_date, subject, paper_code)
+            # Subject: everything before the paper code, or else the first paper ID
+            end = code_match.start() if code_match else pid_matches[0].start()
+            subject = full_text[line_start:end].strip()
+            subject = _WS_RE.sub(' ', subject).strip(' -')
 
-        i += 1
+            for m in pid_matches:
+                exam_map[intern(m.group('pid'))] = (current_date, subject, paper_code)
 
     return exam_map
 
 # ------------------------------------------------------------
 # 2. Parse Roll List (table + text fallback + brute force)
 # ------------------------------------------------------------
-def parse_roll_list(pdf_file, force_text=False):
-    students = []
-    paper_id_pattern = re.compile(r'\b(\d{5})\b')
-    roll_pattern = re.compile(r'\b(\d{9,})\b')   # roll numbers are at least 9 digits
-
-    # Extract all text first (for debugging and fallback)
-    with pdfplumber.open(pdf_file) as pdf:
-        full_text = ""
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n"
+@st.cache_data(show_spinner=False)
+def parse_roll_list(pages, tables=None, force_text=False):
+    # Columns rather than one dict per student: build_schedule turns them straight into a frame
+    rolls = []
+    names = []
+    paper_id_lists = []
+
+    # Full text is used by the text and brute force fallbacks
+    full_text = "\n".join(pages)
 
     # Try table extraction unless forced to text mode
-    if not force_text:
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables:
-                    for row in table:
-                        if not row:
-                            continue
-                        row_str = " ".join([str(c) for c in row if c])
-                        # Look for a roll number (long digit string)
-                        roll_match = roll_pattern.search(row_str)
-                        if not roll_match:
-                            continue
-                        roll_no = roll_match.group(1)
-
-                        # Try to get name from columns
-                        name = ""
-                        for cell in row:
-                            cell_str = str(cell) if cell else ""
-                            if cell_str and not roll_pattern.search(cell_str) and len(cell_str) > 2:
-                                name = cell_str.strip()
-                                break
-                        if not name:
-                            name = "UNKNOWN"
-
-                        paper_ids = paper_id_pattern.findall(row_str)
-                        paper_ids = list(dict.fromkeys(paper_ids))
-
-                        if paper_ids:
-                            students.append({
-                                'roll_no': roll_no,
-                                'student_name': name,
-                                'paper_ids': paper_ids
-                            })
+    if not force_text and tables:
+        for table in tables:
+            for row in table:
+                # Cheap pre-check: a roll number needs a cell of at least 9 characters,
+                # so headers and spacer rows are skipped before any join or regex
+                if not row or not any(c and len(c) >= 9 for c in row):
+                    continue
+                cells = [str(c) for c in row if c]   # shared by the roll/ID scan and the name probe
+                row_str = " ".join(cells)
+                # Look for a roll number (long digit string)
+                roll_match = _ROLL_RE.search(row_str)
+                if not roll_match:
+                    continue
+                roll_no = roll_match.group(1)
+
+                paper_ids = _PAPER_ID_RE.findall(row_str)
+                if not paper_ids:
+                    continue
+                # Order-preserving dedup. IDs are interned: a few hundred distinct papers
+                # repeat across thousands of students, so every repeat shares one string
+                paper_ids = list(dict.fromkeys(map(intern, paper_ids)))
+
+                # Try to get name from columns: first cell longer than 2 chars without a roll number
+                name = next((c.strip() for c in cells if len(c) > 2 and not _ROLL_RE.search(c)), "") or "UNKNOWN"
+
+                rolls.append(roll_no)
+                names.append(name)
+                paper_id_lists.append(paper_ids)
 
     # If no students found via tables, use text chunking
-    if not students:
+    if not rolls:
         st.info("Table extraction gave no results – using text chunking.")
-        # Split by "Roll No"
-        chunks = re.split(r'(Roll\s*No\.?\s*)', full_text, flags=re.IGNORECASE)
-        for i in range(1, len(chunks), 2):
-            block = chunks[i] + chunks[i+1] if i+1 < len(chunks) else chunks[i]
+        # Split by "Roll No": each block runs from one label to the next, sliced once by offset
+        starts = [m.start() for m in _ROLL_SPLIT_RE.finditer(full_text)]
+        starts.append(len(full_text))
+        for k in range(len(starts) - 1):
+            # Shortest usable block: "RollNo" + 9-digit roll + separator + 5-digit paper ID
+            if starts[k+1] - starts[k] < 21:
+                continue
+            block = full_text[starts[k]:starts[k+1]]
 
-            roll_match = roll_pattern.search(block)
+            roll_match = _ROLL_RE.search(block)
             if not roll_match:
                 continue
             roll_no = roll_match.group(1)
 
-            # Extract name: look for "Name" field
-            name_match = re.search(r'Name\s+([A-Z\s]+?)\s+(Father|SUBJECTS|Roll|$)', block, re.IGNORECASE)
+            # Blocks without paper IDs are dropped, so check before the name regexes
+            paper_ids = _PAPER_ID_RE.findall(block)
+            if not paper_ids:
+                continue
+            paper_ids = list(dict.fromkeys(map(intern, paper_ids)))
+
+            # Extract name: look for the first "Name" field
+            label = _NAME_LABEL_RE.search(block)
+            name_match = _NAME_RE.match(block, label.start()) if label else None
             if name_match:
                 student_name = name_match.group(1).strip()
             else:
@@ -140,123 +239,153 @@ def parse_roll_list(pdf_file, force_text=False):
                         break
                 student_name = name if name else "UNKNOWN"
 
-            paper_ids = paper_id_pattern.findall(block)
-            paper_ids = list(dict.fromkeys(paper_ids))
-
-            if roll_no and paper_ids:
-                students.append({
-                    'roll_no': roll_no,
-                    'student_name': student_name,
-                    'paper_ids': paper_ids
-                })
+            rolls.append(roll_no)
+            names.append(student_name)
+            paper_id_lists.append(paper_ids)
 
     # If still no students, try brute force: find all roll numbers and collect nearby paper IDs
-    if not students:
+    if not rolls:
         st.warning("Still no students – attempting brute force extraction.")
         # Find all roll numbers
-        roll_matches = list(roll_pattern.finditer(full_text))
+        roll_matches = list(_ROLL_RE.finditer(full_text))
+        # Scan the paper IDs once; each roll's window is then a bisect over their positions
+        pid_pos = []
+        pid_val = []
+        for m in _PAPER_ID_RE.finditer(full_text):
+            pid_pos.append(m.start())
+            pid_val.append(m.group(1))
         for i, match in enumerate(roll_matches):
             roll_no = match.group(1)
             # Get a window of text around the roll number (e.g., 2000 chars before and after)
             start = max(0, match.start() - 1000)
             end = min(len(full_text), match.end() + 1000)
-            context = full_text[start:end]
-            paper_ids = paper_id_pattern.findall(context)
-            paper_ids = list(dict.fromkeys(paper_ids))
+            lo = bisect_left(pid_pos, start)
+            hi = bisect_right(pid_pos, end - 5)   # the whole 5-digit ID must fit in the window
+            paper_ids = list(dict.fromkeys(map(intern, pid_val[lo:hi])))
             if paper_ids:
                 # Try to find a name near the roll number
                 # Look for a capitalized word before the roll number
-                name_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', context[:match.start()-start])
+                name_match = _CAP_NAME_RE.search(full_text, start, match.start())
                 student_name = name_match.group(1) if name_match else "UNKNOWN"
-                students.append({
-                    'roll_no': roll_no,
-                    'student_name': student_name,
-                    'paper_ids': paper_ids
-                })
+                rolls.append(roll_no)
+                names.append(student_name)
+                paper_id_lists.append(paper_ids)
 
-    return students
+    return {'roll_no': rolls, 'student_name': names, 'paper_ids': paper_id_lists}
 
 # ------------------------------------------------------------
 # 3. Merge
 # ------------------------------------------------------------
+@st.cache_data(show_spinner=False)
 def build_schedule(exam_map, students):
-    rows = []
-    for s in students:
-        roll = s['roll_no']
-        name = s['student_name']
-        for pid in s['paper_ids']:
-            if pid in exam_map:
-                date, subject, code = exam_map[pid]
-                rows.append({
-                    'Roll No': roll,
-                    'Student Name': name,
-                    'Exam Date': date,
-                    'Subject': subject,
-                    'Paper Code': code,
-                    'Paper ID': pid
-                })
-            else:
-                rows.append({
-                    'Roll No': roll,
-                    'Student Name': name,
-                    'Exam Date': 'NOT FOUND',
-                    'Subject': 'UNKNOWN',
-                    'Paper Code': '',
-                    'Paper ID': pid
-                })
-    return pd.DataFrame(rows)
+    # students is the column dict from parse_roll_list: one row per (student, paper ID),
+    # then a single left join against the date sheet
+    students_df = pd.DataFrame({
+        'Roll No': students['roll_no'],
+        'Student Name': students['student_name'],
+        'Paper ID': students['paper_ids'],
+    }, dtype=object).explode('Paper ID')   # object keeps an empty roll list mergeable
+    exam_df = pd.DataFrame(
+        [(pid, *entry) for pid, entry in exam_map.items()],
+        columns=['Paper ID', 'Exam Date', 'Subject', 'Paper Code'],
+    )
+    df = students_df.merge(exam_df, on='Paper ID', how='left')
+    df = df.fillna({'Exam Date': 'NOT FOUND', 'Subject': 'UNKNOWN', 'Paper Code': ''})
+    # Only a handful of distinct dates/subjects/codes repeat across every row
+    for col in ('Exam Date', 'Subject', 'Paper Code'):
+        df[col] = df[col].astype('category')
+    return df[['Roll No', 'Student Name', 'Exam Date', 'Subject', 'Paper Code', 'Paper ID']]
 
 # ------------------------------------------------------------
-# 4. UI
+# 4. Excel export
 # ------------------------------------------------------------
-col1, col2 = st.columns(2)
-with col1:
-    date_file = st.file_uploader("📅 Date Sheet PDF", type="pdf", key="date")
-with col2:
-    roll_file = st.file_uploader("🧑‍🎓 Confidential List / Roll List PDF", type="pdf", key="roll")
-
-if date_file and roll_file:
-    with st.spinner("🔍 Parsing PDFs..."):
-        exam_map = parse_date_sheet(date_file)
-        students = parse_roll_list(roll_file)
-        df = build_schedule(exam_map, students)
-
-    # ---------- Debug: show raw text snippets ----------
-    with st.expander("📄 Raw text from Date Sheet (first 1000 chars)"):
-        with pdfplumber.open(date_file) as pdf:
-            raw = "".join([p.extract_text() or "" for p in pdf.pages])[:1000]
-        st.text(raw)
-
-    with st.expander("📄 Raw text from Roll List (first 1000 chars)"):
-        with pdfplumber.open(roll_file) as pdf:
-            raw = "".join([p.extract_text() or "" for p in pdf.pages])[:1000]
-        st.text(raw)
-
-    with st.expander("📊 Extracted date sheet entries"):
-        if exam_map:
-            st.write(f"Found {len(exam_map)} paper entries. Sample:")
-            st.json({k: exam_map[k] for k in list(exam_map)[:5]})
-        else:
-            st.error("No paper IDs found in date sheet. Check the raw text above.")
+def to_excel(df):
+    # constant_memory flushes each row as soon as the next one starts, so peak memory
+    # stays flat. It requires row-by-row writes: DataFrame.to_excel writes column by
+    # column, which constant_memory would silently drop.
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    sheet = workbook.add_worksheet('Schedule')
+    # Size each column to its longest value up front, so no second pass over the sheet
+    for c, col in enumerate(df.columns):
+        longest = df[col].astype(str).str.len().max() if len(df) else 0
+        sheet.set_column(c, c, min(max(len(col), int(longest)) + 2, 50))
+    # Same header style DataFrame.to_excel applies
+    header = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    sheet.write_row(0, 0, df.columns, header)
+    for r, row in enumerate(df.itertuples(index=False), start=1):
+        sheet.write_row(r, 0, row)
+    workbook.close()
+    output.seek(0)
+    return output
+
+# ------------------------------------------------------------
+# 5. UI
+# ------------------------------------------------------------
+def text_preview(pages, limit=1000):
+    # Same as "\n".join(pages)[:limit], but stops joining once enough text is collected
+    parts = []
+    total = 0
+    for text in pages:
+        parts.append(text)
+        total += len(text)
+        if total >= limit:
+            break
+        total += 1   # the newline joining this page to the next
+    return "\n".join(parts)[:limit]
+
+# Streamlit runs this script as __main__; spawned table workers run it as __mp_main__
+# and only need the definitions above
+if __name__ == "__main__":
+    st.set_page_config(page_title="Exam Schedule", layout="wide")
+    st.title("📋 Exam Schedule")
+    # st.markdown("Upload **Date Sheet PDF** and **Roll List PDF**. If extraction fails, expand the debug sections to see raw text.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        date_file = st.file_uploader("📅 Date Sheet PDF", type="pdf", key="date")
+    with col2:
+        roll_file = st.file_uploader("🧑‍🎓 Confidential List / Roll List PDF", type="pdf", key="roll")
+
+    if date_file and roll_file:
+        with st.spinner("🔍 Parsing PDFs..."):
+            date_pages = extract_all_text(date_file.getvalue())
+            roll_bytes = roll_file.getvalue()
+            roll_pages = extract_all_text(roll_bytes)
+            exam_map = parse_date_sheet(date_pages)
+            roll_tables = extract_all_tables(roll_bytes, expected_candidates(roll_pages))
+            students = parse_roll_list(roll_pages, roll_tables)
+            df = build_schedule(exam_map, students)
+
+        # ---------- Debug: show raw text snippets ----------
+        with st.expander("📄 Raw text from Date Sheet (first 1000 chars)"):
+            st.text(text_preview(date_pages))
+
+        with st.expander("📄 Raw text from Roll List (first 1000 chars)"):
+            st.text(text_preview(roll_pages))
+
+        with st.expander("📊 Extracted date sheet entries"):
+            if exam_map:
+                st.write(f"Found {len(exam_map)} paper entries. Sample:")
+                st.json({k: exam_map[k] for k in list(exam_map)[:5]})
+            else:
+                st.error("No paper IDs found in date sheet. Check the raw text above.")
+
+        with st.expander("🧑‍🎓 Extracted students"):
+            if students['roll_no']:
+                st.write(f"Found {len(students['roll_no'])} students. Sample:")
+                st.json({k: v[:3] for k, v in students.items()})
+            else:
+                st.error("No students found in roll list. Check the raw text above and try the 'Force text mode' option.")
+
+        if not df.empty:
+            st.success(f"✅ Generated {len(df)} schedule rows for {df['Roll No'].nunique()} students.")
+            st.subheader("📊 Preview (first 30)")
+            st.dataframe(df.head(30), use_container_width=True)
 
-    with st.expander("🧑‍🎓 Extracted students"):
-        if students:
-            st.write(f"Found {len(students)} students. Sample:")
-            st.json(students[:3])
+            output = to_excel(df)
+            st.download_button("📥 Download in Excel", data=output,
+                               file_name="exam_schedule.xlsx",
+                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         else:
-            st.error("No students found in roll list. Check the raw text above and try the 'Force text mode' option.")
-
-    if not df.empty:
-        st.success(f"✅ Generated {len(df)} schedule rows for {df['Roll No'].nunique()} students.")
-        st.subheader("📊 Preview (first 30)")
-        st.dataframe(df.head(30), use_container_width=True)
-
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Schedule')
-        output.seek(0)
-        st.download_button("📥 Download in Excel", data=output,
-                           file_name="exam_schedule.xlsx",
-                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    else:
-        st.error("No data could be extracted. Please check the raw text above and ensure the PDFs are text-based (not scanned).")
+            st.error("No data could be extracted. Please check the raw text above and ensure the PDFs are text-based (not scanned).")